@@ -3,6 +3,7 @@ import time
 import random
 import json
 import re
+import asyncio
 import requests
 import feedparser
 import google.generativeai as genai
@@ -16,6 +17,7 @@ from docx import Document
 import base64
 import streamlit.components.v1 as components
 from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, parse_qs
 from datetime import date, timedelta  # 🆕 for date bucketing
 
@@ -32,36 +34,47 @@ client = InferenceClient(
 # ======================
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+    # REST transport: the async client's grpc.aio channel binds to the
+    # first event loop that uses it, but classify_articles_gemini_bulk
+    # spins a fresh asyncio.run loop per click - over gRPC every click
+    # after the first would fail on the closed loop.
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest")
 # Use gemini-1.5-flash for speed and cost efficiency
 gemini_model = genai.GenerativeModel('gemini-1.5-flash') if GEMINI_API_KEY else None
 
 def summarize_text(text: str, method: str = "Hugging Face") -> str:
     if not text or not text.strip():
         return "No content to summarize."
-    
-    if method == "Gemini AI":
-        try:
-            prompt = f"Summarize the following news article briefly (2-3 sentences):\n\n{text[:5000]}"
-            response = gemini_model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            return f"Gemini Summarization Error: {e}"
-            
+
+    # Errors are reported but never cached: the cached helper raises, so a
+    # one-off HF/Gemini hiccup can't pin this text to an error string for
+    # the whole session.
     try:
-        result = client.summarization(text, model="Falconsai/text_summarization")
-        if hasattr(result, "summary_text"):
-            return result.summary_text
-        if isinstance(result, list) and result:
-            first = result[0]
-            if isinstance(first, dict) and "summary_text" in first:
-                return first["summary_text"]
-        if isinstance(result, dict) and "summary_text" in result:
-            return result["summary_text"]
-        return str(result)
+        return _summarize_text_cached(text, method)
     except Exception as e:
+        if method == "Gemini AI":
+            return f"Gemini Summarization Error: {e}"
         return f"Error: {e}"
 
+
+@st.cache_data(show_spinner=False)
+def _summarize_text_cached(text: str, method: str) -> str:
+    if method == "Gemini AI":
+        prompt = f"Summarize the following news article briefly (2-3 sentences):\n\n{text[:5000]}"
+        response = gemini_model.generate_content(prompt)
+        return response.text.strip()
+
+    result = client.summarization(text, model="Falconsai/text_summarization")
+    if hasattr(result, "summary_text"):
+        return result.summary_text
+    if isinstance(result, list) and result:
+        first = result[0]
+        if isinstance(first, dict) and "summary_text" in first:
+            return first["summary_text"]
+    if isinstance(result, dict) and "summary_text" in result:
+        return result["summary_text"]
+    return str(result)
+
 # ======================
 # User-Agents
 # ======================
@@ -167,7 +180,7 @@ def get_article_url_basic(rss_url: str) -> str:
     try:
         resp = requests.get(rss_url)
         resp.raise_for_status()
-        data = BeautifulSoup(resp.text, 'html.parser').select_one('c-wiz[data-p]').get('data-p')
+        data = BeautifulSoup(resp.text, 'lxml').select_one('c-wiz[data-p]').get('data-p')
         obj = json.loads(data.replace('%.@.', '["garturlreq",'))
         payload = {'f.req': json.dumps([[['Fbv4je', json.dumps(obj[:-6] + obj[-2:]), 'null', 'generic']]])}
         headers = {'content-type': 'application/x-www-form-urlencoded;charset=UTF-8','user-agent': random.choice(USER_AGENTS)}
@@ -199,7 +212,7 @@ def get_article_url_adv(rss_url: str) -> str:
     try:
         resp = requests.get(rss_url, headers=_UA(), timeout=12)
         resp.raise_for_status()
-        data = BeautifulSoup(resp.text, 'html.parser').select_one('c-wiz[data-p]').get('data-p')
+        data = BeautifulSoup(resp.text, 'lxml').select_one('c-wiz[data-p]').get('data-p')
         obj = json.loads(data.replace('%.@.', '["garturlreq",'))
         payload = {'f.req': json.dumps([[['Fbv4je', json.dumps(obj[:-6] + obj[-2:]), 'null', 'generic']]])}
         headers = {'content-type': 'application/x-www-form-urlencoded;charset=UTF-8','user-agent': random.choice(USER_AGENTS)}
@@ -231,7 +244,7 @@ def fetch_article_content_adv(url: str) -> str:
         pass
     try:
         r = requests.get(url, timeout=12, headers=_UA()); r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = BeautifulSoup(r.text, "lxml")
         art = soup.find("article")
         if art:
             text = "\n".join(p.get_text(" ", strip=True) for p in art.find_all("p"))
@@ -360,7 +373,19 @@ def classify_article(title, source, link, article_text, compiled_clusters,
 def classify_article_gemini(headline, source, content, cluster_names):
     """
     Uses Gemini to classify an article into one of the provided clusters.
+    Successful results are cached so the same article never pays the API
+    round-trip twice; API errors raise out of the cached helper instead,
+    so a transient failure isn't memoized for the session.
     """
+    try:
+        return _classify_article_gemini_cached(headline, source, content, cluster_names)
+    except Exception as e:
+        print(f"Gemini Error: {e}")
+        return None, 0.0, {}
+
+
+@st.cache_data(show_spinner=False)
+def _classify_article_gemini_cached(headline, source, content, cluster_names):
     if not content or len(content.strip()) < 50:
         content = "No content available. Classify based on headline only."
     
@@ -378,23 +403,99 @@ def classify_article_gemini(headline, source, content, cluster_names):
 
     Respond ONLY with the name of the cluster or "NONE". Do not provide any explanation.
     """
+    response = gemini_model.generate_content(prompt)
+    result = response.text.strip()
+    # Clean up in case Gemini adds markdown or extra text
+    result = result.replace("**", "").replace('"', '').replace("'", "").strip()
+
+    if result in cluster_names:
+        return result, 1.0, {result: 1.0}
+    # Check for case-insensitive match; "NONE"/unmatched is a valid
+    # (and cacheable) answer, unlike an API error
+    for c in cluster_names:
+        if result.lower() == c.lower():
+            return c, 1.0, {c: 1.0}
+    return None, 0.0, {}
+
+def classify_articles_gemini_bulk(items, cluster_names, batch_size=20):
+    """
+    Classifies many articles per Gemini call instead of one prompt each.
+    `items` is a list of (headline, content) pairs; returns a list of
+    (primary_cluster, relevance, matches) tuples aligned with `items`,
+    matching classify_article_gemini's result shape. Batch prompts are
+    dispatched concurrently, so total latency is one round-trip window.
+    """
+    clusters_str = ", ".join(cluster_names)
+    lower_map = {c.lower(): c for c in cluster_names}
+
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    prompts = []
+    for batch in batches:
+        numbered = "\n".join(
+            f"{i + 1}. Headline: {headline}\n   Content snippet: {(content or '')[:600]}"
+            for i, (headline, content) in enumerate(batch)
+        )
+        prompts.append(f"""
+    You are a professional news analyst. Classify EACH of the following news articles into EXACTLY ONE of these sectors/clusters:
+    [{clusters_str}]
+
+    If an article fits multiple, pick the most relevant one.
+    If it fits NONE of them, use "NONE".
+
+    Articles:
+{numbered}
+
+    Respond ONLY with a JSON array of {len(batch)} cluster names (or "NONE"), in the same order as the articles. Do not provide any explanation.
+    """)
+
+    async def _run_all():
+        return await asyncio.gather(
+            *[gemini_model.generate_content_async(p) for p in prompts],
+            return_exceptions=True
+        )
+
     try:
-        response = gemini_model.generate_content(prompt)
-        result = response.text.strip()
-        # Clean up in case Gemini adds markdown or extra text
-        result = result.replace("**", "").replace('"', '').replace("'", "").strip()
-        
-        if result in cluster_names:
-            return result, 1.0, {result: 1.0}
+        responses = asyncio.run(_run_all())
+    except Exception:
+        # Async API unavailable - fall back to sequential calls
+        responses = []
+        for prompt in prompts:
+            try:
+                responses.append(gemini_model.generate_content(prompt))
+            except Exception as e:
+                responses.append(e)
+
+    results = []
+    for batch, response in zip(batches, responses):
+        labels = []
+        if isinstance(response, Exception):
+            # gather(return_exceptions=True) lands per-batch failures here,
+            # not in the asyncio.run except above
+            print(f"Gemini Error: {response}")
         else:
-            # Check for case-insensitive match
-            for c in cluster_names:
-                if result.lower() == c.lower():
-                    return c, 1.0, {c: 1.0}
-            return None, 0.0, {}
-    except Exception as e:
-        print(f"Gemini Error: {e}")
-        return None, 0.0, {}
+            try:
+                match = re.search(r'\[.*\]', response.text, re.DOTALL)
+                if match:
+                    labels = json.loads(match.group(0))
+            except Exception as e:
+                print(f"Gemini Error: {e}")
+
+        if not labels:
+            # Failed or unparseable batch: retry each article through the
+            # cached sync classifier instead of writing the whole batch
+            # off as (None, 0.0, {})
+            for headline, content in batch:
+                results.append(classify_article_gemini(headline, "", content, cluster_names))
+            continue
+
+        for i in range(len(batch)):
+            label = lower_map.get(str(labels[i]).lower()) if i < len(labels) else None
+            if label:
+                results.append((label, 1.0, {label: 1.0}))
+            else:
+                results.append((None, 0.0, {}))
+
+    return results
 
 # ======================
 # EXPORTS (unchanged)
@@ -570,6 +671,41 @@ if st.button(btn_label):
         compiled = compile_patterns(st.session_state.get("clusters", DEFAULT_CLUSTERS))
 
     total = max(1, len(entries))
+
+    # Resolve links and fetch article bodies concurrently — both are
+    # network-bound, so threads overlap the round-trips instead of paying
+    # them one at a time inside the loop below.
+    def _prefetch(entry):
+        # Modest jitter per worker: the resolve step hits news.google.com
+        # (twice per entry) and 16 bare threads would hammer it in lockstep
+        time.sleep(random.uniform(0.05, 0.25))
+        raw_link = getattr(entry, "link", None) or (entry.get("link") if isinstance(entry, dict) else "")
+        if mode.startswith("Basic"):
+            link = get_article_url_basic(raw_link) if raw_link else raw_link
+            article = fetch_article_content_basic(link) if link else ""
+        else:
+            link = get_article_url_adv(raw_link) if raw_link else raw_link
+            article = fetch_article_content_adv(link) if link else ""
+        return link, article
+
+    status.text(f"Fetching {total} articles…")
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        prefetched = list(pool.map(_prefetch, entries))
+
+    # With content prefetched, Gemini classification can run in bulk prompts
+    # (20 articles per call) instead of one round-trip per article.
+    bulk_classifications = None
+    if (mode.startswith("Advanced") and 'classification_method' in locals()
+            and classification_method == "Gemini AI (High Accuracy)" and gemini_model):
+        status.text("Classifying articles with Gemini…")
+        cluster_names = list(st.session_state.get("clusters", DEFAULT_CLUSTERS).keys())
+        items = [
+            (getattr(entry, "title", None) or (entry.get("title") if isinstance(entry, dict) else ""),
+             prefetched[i][1])
+            for i, entry in enumerate(entries)
+        ]
+        bulk_classifications = classify_articles_gemini_bulk(items, cluster_names)
+
     for i, entry in enumerate(entries):
         progress.progress((i + 1) / total)
         status.text(f"Processing {i + 1}/{total}")
@@ -582,14 +718,7 @@ if st.button(btn_label):
                 source = src.get("title", "")
         published = getattr(entry, "published", None) or (entry.get("published") if isinstance(entry, dict) else "") or getattr(entry, "updated", "")
 
-        raw_link = getattr(entry, "link", None) or (entry.get("link") if isinstance(entry, dict) else "")
-
-        if mode.startswith("Basic"):
-            link = get_article_url_basic(raw_link) if raw_link else raw_link
-            article = fetch_article_content_basic(link) if link else ""
-        else:
-            link = get_article_url_adv(raw_link) if raw_link else raw_link
-            article = fetch_article_content_adv(link) if link else ""
+        link, article = prefetched[i]
 
         if india_only:
             haystack = " ".join([title or "", source or "", article or ""]).lower()
@@ -610,9 +739,12 @@ if st.button(btn_label):
         if mode.startswith("Advanced"):
             if 'classification_method' in locals() and classification_method == "Gemini AI (High Accuracy)":
                 cluster_names = list(st.session_state.get("clusters", DEFAULT_CLUSTERS).keys())
-                primary_cluster, relevance, matches = classify_article_gemini(
-                    title, source, article, cluster_names
-                )
+                if bulk_classifications is not None:
+                    primary_cluster, relevance, matches = bulk_classifications[i]
+                else:
+                    primary_cluster, relevance, matches = classify_article_gemini(
+                        title, source, article, cluster_names
+                    )
             else:
                 primary_cluster, relevance, matches = classify_article(
                     title, source, link, article, compiled,
@@ -641,8 +773,6 @@ if st.button(btn_label):
                 st.markdown("**Article:**"); st.write(article)
             st.markdown("**Summary:**"); st.write(summary)
 
-        time.sleep(0.2 + random.random() * 0.4)
-
     st.session_state.data = results
     progress.empty()
     status.success("Done!")
@@ -1,83 +1,180 @@
 import os
 import requests
 import feedparser
-from bs4 import BeautifulSoup
 import streamlit as st
-import pandas as pd
+from collections import OrderedDict
 from io import BytesIO
+from urllib.parse import urlsplit
 import asyncio
 import aiohttp
 import re
-import google.generativeai as genai
 import json
+import hashlib
+import time
+import html
+import math
 
 # Import our helper tools (which we wrote in other files)
 from gdelt_fetcher import fetch_gdelt_simple
-from article_scraper import enhance_articles_async
+from article_scraper import enhance_articles_stream
 from smart_search import expand_query
 
+# Compiled once; the display loop splits every article summary with it
+_SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+# Tracking params carry no routing information, so they are stripped from
+# dedupe keys; real query params (e.g. article.php?id=123) must survive.
+_TRACKING_PARAM_RE = re.compile(r'(?:utm_\w*|fbclid|gclid|igshid|mc_[ce]id)=')
+
 # --- GEMINI SETUP ---
 # Removed hardcoded key for security. Use environment variable 'GEMINI_API_KEY'.
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-# Use gemini-1.5-flash for high-speed, reliable intelligence and long-context processing
-gemini_model = genai.GenerativeModel('gemini-1.5-flash') if GEMINI_API_KEY else None
 
-def classify_article_gemini(headline, source, content, cluster_names):
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_model():
     """
-    Uses Gemini to classify an article into one of the provided clusters.
+    Imports google.generativeai on first use. The import alone drags in
+    gRPC (~50MB RSS and a noticeable cold start), so it must not run at
+    app boot, and the model handle owns a gRPC channel that is worth
+    keeping as a process-wide singleton rather than rebuilding per rerun.
+    Returns (genai module, model), or (None, None) when no key is set.
+    gemini-1.5-flash for high-speed, long-context work.
     """
-    if not content or len(content.strip()) < 50:
-        content = "No content available. Classify based on headline only."
-    
-    if not gemini_model:
-        return "GENERAL"
-        
-    clusters_str = ", ".join(cluster_names)
-    prompt = f"""
-    You are a professional news analyst. Classify the following news article into EXACTLY ONE of these sectors/clusters:
+    if not GEMINI_API_KEY:
+        return None, None
+    import google.generativeai as genai
+    # REST transport instead of gRPC: the async client's grpc.aio channel
+    # binds itself to the first event loop that touches it, and every
+    # search here runs under a fresh asyncio.run loop - over gRPC the
+    # second search's generate_content_async calls all die on the closed
+    # loop. REST requests carry no loop affinity.
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest")
+    return genai, genai.GenerativeModel('gemini-1.5-flash')
+
+# Process-wide memo for the Gemini paths. st.cache_data cannot wrap
+# coroutines, so the async helpers share this map keyed on content hashes.
+# Bounded LRU so long sessions can't grow it without limit.
+_AI_CACHE = OrderedDict()
+_AI_CACHE_MAX = 20000
+
+
+def _ai_cache_get(key):
+    value = _AI_CACHE.get(key)
+    if value is not None:
+        _AI_CACHE.move_to_end(key)
+    return value
+
+
+def _ai_cache_put(key, value):
+    _AI_CACHE[key] = value
+    _AI_CACHE.move_to_end(key)
+    if len(_AI_CACHE) > _AI_CACHE_MAX:
+        _AI_CACHE.popitem(last=False)
+
+
+def _content_key(*parts) -> str:
+    """Stable sha1 over the prompt-relevant parts of a Gemini call."""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part.encode('utf-8', 'ignore'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+# Canonical lowercase->original cluster-name maps, built once per distinct
+# cluster list instead of rescanning the list for every classified article
+_CLUSTER_MAPS = {}
+
+
+def _cluster_lower_map(cluster_names):
+    key = tuple(cluster_names)
+    cached = _CLUSTER_MAPS.get(key)
+    if cached is None:
+        cached = _CLUSTER_MAPS.setdefault(key, {c.lower(): c for c in key})
+    return cached
+
+
+def _build_classification_prompt(batch, clusters_str):
+    """Builds the multi-article classification prompt for one batch."""
+    numbered = "\n".join(
+        f"{i}. Headline: {a.get('title', '')} | Source: {a.get('source', '')}\n"
+        f"   Content snippet: {(a.get('full_text') or 'No content available. Classify based on headline only.')[:600]}"
+        for i, a in enumerate(batch)
+    )
+    return f"""
+    You are a professional news analyst. Classify EACH numbered article into EXACTLY ONE of these sectors/clusters:
     [{clusters_str}]
 
-    If it fits multiple, pick the most relevant one. 
-    If it fits NONE of them, respond with "NONE".
+    If an article fits multiple, pick the most relevant one.
+    If it fits NONE of them, use "NONE".
 
-    Article Headline: {headline}
-    Source: {source}
-    Full Content snippet: {content[:3000]}
+    Articles:
+{numbered}
 
-    Respond ONLY with the name of the cluster or "NONE". Do not provide any explanation.
+    Respond ONLY with a JSON array of objects like {{"id": 0, "cluster": "<name or NONE>"}} covering every article. Do not provide any explanation.
     """
-    try:
-        response = gemini_model.generate_content(prompt)
-        result = response.text.strip()
-        # Clean up in case Gemini adds markdown or extra text
-        result = result.replace("**", "").replace('"', '').replace("'", "").strip()
-        
-        if result in cluster_names:
-            return result
-        else:
-            # Check for case-insensitive match
-            for c in cluster_names:
-                if result.lower() == c.lower():
-                    return c
-            return "GENERAL"
-    except Exception:
-        return "GENERAL"
-
-def summarize_text_gemini(text: str) -> str:
+
+
+async def classify_articles_batch_async(articles, cluster_names, batch_size=20, semaphore=None):
     """
-    Uses Gemini 1.5 Pro to provide a comprehensive, deep-dive summary of the article.
+    Classifies articles in batches of `batch_size` per Gemini call instead of
+    one request per article, with all batch prompts in flight concurrently.
+    Writes 'gemini_sector' onto each article dict.
     """
-    if not text or not text.strip():
-        return "No content to summarize."
+    genai, gemini_model = get_gemini_model()
     if not gemini_model:
-        # Fallback to a simple 6-line slice if Gemini is not configured
-        words = text.split()
-        return " ".join(words[:100]) + "..."
+        for art in articles:
+            art['gemini_sector'] = "GENERAL"
+        return
 
-    try:
-        prompt = f"""
+    clusters_str = ", ".join(cluster_names)
+    clusters_key = ",".join(sorted(cluster_names))
+    lower_map = _cluster_lower_map(cluster_names)
+    semaphore = semaphore or asyncio.Semaphore(16)
+    gen_config = genai.GenerationConfig(response_mime_type="application/json")
+
+    # Serve repeat articles straight from the memo; only the misses get batched.
+    pending = []
+    keys = {}
+    for art in articles:
+        key = _content_key('classify', art.get('title', ''),
+                           (art.get('full_text') or '')[:600], clusters_key)
+        cached = _ai_cache_get(key)
+        if cached is not None:
+            art['gemini_sector'] = cached
+        else:
+            keys[id(art)] = key
+            pending.append(art)
+
+    async def classify_batch(batch):
+        labels = {}
+        ok = False
+        try:
+            async with semaphore:
+                response = await gemini_model.generate_content_async(
+                    _build_classification_prompt(batch, clusters_str),
+                    generation_config=gen_config
+                )
+            for row in json.loads(response.text):
+                labels[int(row.get("id", -1))] = str(row.get("cluster", ""))
+            ok = True
+        except Exception:
+            # Bad batch response -> every article in it falls back to GENERAL
+            pass
+
+        for i, art in enumerate(batch):
+            art['gemini_sector'] = lower_map.get(labels.get(i, "").lower(), "GENERAL")
+            if ok:
+                # Only successful responses are worth remembering
+                _ai_cache_put(keys[id(art)], art['gemini_sector'])
+
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    await asyncio.gather(*(classify_batch(b) for b in batches))
+
+
+def _build_summary_prompt(text: str) -> str:
+    return f"""
         You are an expert news intelligence analyst. Provide a COMPREHENSIVE and DETAILED summary of the following news article.
         
         Guidelines:
@@ -88,14 +185,190 @@ def summarize_text_gemini(text: str) -> str:
         5. Structure the response with a clear hierarchy (Headings/Bullets/Paragraphs) to make it highly professional.
         
         Article Content:
-        {text[:15000]}
+        {text[:6000]}
         """
-        response = gemini_model.generate_content(prompt)
-        return response.text.strip()
+
+
+async def summarize_text_gemini_async(text: str) -> str:
+    """
+    Uses Gemini to provide a comprehensive, deep-dive summary of the
+    article; async so many summaries can be in flight at once instead of
+    one round-trip per article.
+    """
+    if not text or not text.strip():
+        return "No content to summarize."
+    words = text.split()
+    if len(words) < 200:
+        # Short items are already their own summary - not worth a round-trip
+        return text.strip()
+    _, gemini_model = get_gemini_model()
+    if not gemini_model:
+        return " ".join(words[:100]) + "..."
+
+    key = _content_key('summary', text[:6000])
+    cached = _ai_cache_get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = await gemini_model.generate_content_async(_build_summary_prompt(text))
+        summary = response.text.strip()
+        _ai_cache_put(key, summary)
+        return summary
     except Exception as e:
         return f"Gemini Summarization Error: {e}"
 
 
+async def enhance_and_analyze_async(articles, cluster_names, progress_callback=None, max_concurrency=16):
+    """
+    Streams scraped articles and pipelines the Gemini stage: an article's
+    summary request goes out the moment its scrape completes, while other
+    pages are still downloading. Classification is batched once all text
+    is in, since the batch prompts need the full set to pack efficiently.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    total = len(articles)
+    completed = 0
+    summary_tasks = []
+
+    async def bounded_summary(art):
+        async with semaphore:
+            art['gemini_summary'] = await summarize_text_gemini_async(art.get('full_text', ''))
+
+    async for art in enhance_articles_stream(articles):
+        completed += 1
+        if progress_callback:
+            try:
+                progress_callback(completed, total)
+            except Exception:
+                pass
+        if art.get('full_text') and not art.get('is_paywall'):
+            summary_tasks.append(asyncio.ensure_future(bounded_summary(art)))
+
+    await asyncio.gather(
+        classify_articles_batch_async(articles, cluster_names, semaphore=semaphore),
+        *summary_tasks
+    )
+    # The stream mutates the article dicts in place, so returning the
+    # input list keeps the original feed order - collecting yields from
+    # as_completed would hand back network-completion order instead.
+    return articles
+
+
+class GeminiStageError(RuntimeError):
+    """
+    Raised when the Gemini stage of a run failed wholesale, so the degraded
+    result never enters the disk cache (st.cache_data does not memoize
+    exceptions). The scraped articles ride along for one-off display.
+    """
+    def __init__(self, articles):
+        super().__init__("Gemini classification/summarization failed for the whole run")
+        self.articles = articles
+
+
+def _gemini_stage_failed(articles):
+    """
+    True when Gemini failed across the board rather than per-article:
+    every summary-eligible article came back with an error string, or
+    every article fell through to the GENERAL sector. Per-article
+    hiccups inside an otherwise healthy run still get cached.
+    """
+    _, gemini_model = get_gemini_model()
+    if gemini_model is None:
+        # Without a key the fallbacks are the expected output - cache them
+        return False
+    eligible = [a for a in articles
+                if a.get('full_text') and not a.get('is_paywall')
+                and len(a['full_text'].split()) >= 200]
+    if not eligible:
+        return False
+    summaries_failed = all(
+        str(a.get('gemini_summary', '')).startswith('Gemini Summarization Error')
+        for a in eligible)
+    sectors_failed = all(a.get('gemini_sector') == 'GENERAL' for a in articles)
+    return summaries_failed or sectors_failed
+
+
+@st.cache_data(persist="disk", ttl=3600, max_entries=64, show_spinner=False)
+def get_enhanced_articles(optimized_query: str, days: int, cluster_names: tuple, _progress=None):
+    """
+    Full fetch + scrape + Gemini pipeline, cached to disk for an hour.
+
+    Keyed on (optimized_query, days, cluster_names); the underscore on
+    _progress keeps the callback out of the cache key. A repeat search -
+    including the rerun a theme toggle triggers - returns in milliseconds
+    instead of re-scraping thousands of pages.
+    """
+    raw_articles = fetch_gdelt_simple(optimized_query, days=days, max_articles=5000)
+    if not raw_articles:
+        return []
+    
+    # GDELT cross-posts the same story heavily. Dedupe on canonical URL
+    # (lowercased host + path + query, tracking params ignored) before the
+    # scrape: every dropped link saves an HTTP fetch, a parse and the
+    # downstream Gemini work.
+    seen = set()
+    unique_articles = []
+    for art in raw_articles:
+        parts = urlsplit(art.get('link', ''))
+        query = '&'.join(sorted(
+            pair for pair in parts.query.split('&')
+            if pair and not _TRACKING_PARAM_RE.match(pair)
+        ))
+        key = (parts.netloc.lower(), parts.path.rstrip('/'), query)
+        if key not in seen:
+            seen.add(key)
+            unique_articles.append(art)
+    raw_articles = unique_articles
+    
+    enhanced = asyncio.run(enhance_and_analyze_async(
+        raw_articles,
+        list(cluster_names),
+        progress_callback=_progress
+    ))
+    # A run whose Gemini stage collapsed (outage, quota, client bug) must
+    # not be served from the disk cache for the next hour; raising keeps
+    # it out while still handing the scraped articles to the caller.
+    if _gemini_stage_failed(enhanced):
+        raise GeminiStageError(enhanced)
+    return enhanced
+
+
+@st.cache_data(show_spinner=False)
+def build_downloads(articles):
+    """
+    DataFrame + Excel/CSV payloads for the download buttons, cached so a
+    rerun (e.g. a theme flip) doesn't re-serialize the whole workbook.
+    """
+    # pandas and openpyxl are only needed here, so import on first build
+    import pandas as pd
+    import openpyxl
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    
+    df = pd.DataFrame(articles)
+    # write_only mode streams whole rows; xlsxwriter via ExcelWriter makes a
+    # Python call per cell, which dominates once there are thousands of rows.
+    buffer = BytesIO()
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('News')
+    sheet.append(list(df.columns))
+    # Scraped full_text can carry control characters, which write_only
+    # mode rejects with IllegalCharacterError; scrub them per cell so one
+    # dirty article can't take down the whole export.
+    for row in df.itertuples(index=False, name=None):
+        sheet.append([
+            ILLEGAL_CHARACTERS_RE.sub('', cell) if isinstance(cell, str) else cell
+            for cell in row
+        ])
+    workbook.save(buffer)
+    
+    # Write CSV straight into a bytes buffer: no intermediate str that
+    # Streamlit would have to re-encode, and no CRLF expansion.
+    csv_buffer = BytesIO()
+    df.to_csv(csv_buffer, index=False, lineterminator='\n')
+    return buffer.getvalue(), csv_buffer.getvalue()
+
+
 # --- PAGE SETUP ---
 # This configures the browser tab title and layout
 st.set_page_config(page_title="News Intelligence", layout="wide", initial_sidebar_state="collapsed")
@@ -188,51 +461,52 @@ if st.button(button_label, type="primary", use_container_width=True):
         st.session_state.sector_identified = result_context['sector_identified']
         optimized_query = result_context['optimized_query']
 
-        # STEP 1: FIND LINKS
+        # STEP 1+2: FIND LINKS, READ CONTENT & ANALYZE (cached for repeats)
         status.write(f"🔍 Searching Google News for '{optimized_query}'...")
-        raw_articles = fetch_gdelt_simple(optimized_query, days=duration, max_articles=5000)
         
-        if not raw_articles:
+        # Setup the loading bar (0% initially)
+        progress_bar = status.progress(0)
+        
+        # This little function updates the blue bar.
+        # Widget updates travel over the websocket and cost a few ms each,
+        # so throttle to ~20 updates total and at most one every 200ms.
+        last_update = [0.0]
+        
+        def update_progress(current, total):
+            step = max(1, total // 20)
+            if current != total and current % step != 0:
+                return
+            now = time.monotonic()
+            if current != total and now - last_update[0] < 0.2:
+                return
+            last_update[0] = now
+            percent = int((current / total) * 100)
+            progress_bar.progress(percent)
+            status.update(label=f"📖 Reading articles... ({percent}%)")
+        
+        # RUN THE PIPELINE!
+        # One event loop covers scraping, classification and summarization.
+        # A repeat (query, days) search is served straight from the disk cache.
+        status.write("🤖 Scraping + AI Classification & Summarization...")
+        try:
+            enhanced_articles = get_enhanced_articles(
+                optimized_query,
+                duration,
+                tuple(sector_options),
+                _progress=update_progress
+            )
+        except GeminiStageError as degraded:
+            # Show the scraped articles anyway; the degraded run stayed out
+            # of the disk cache, so the next search retries Gemini.
+            enhanced_articles = degraded.articles
+            st.warning("AI classification/summarization failed for this run - "
+                       "showing scraped articles only (result not cached).")
+        
+        if not enhanced_articles:
             status.update(label="❌ No news found!", state="error", expanded=False)
             st.error("No news found for this keyword. Please try another.")
             st.session_state.articles = []
         else:
-            status.write(f"✅ Found {len(raw_articles)} links from around the web.")
-            
-            # STEP 2: READ CONTENT
-            status.write(f"📖 Visiting all {len(raw_articles)} websites to extract content...")
-            
-            # Setup the loading bar (0% initially)
-            progress_bar = status.progress(0)
-            
-            # This little function updates the blue bar
-            def update_progress(current, total):
-                percent = int((current / total) * 100)
-                progress_bar.progress(percent)
-                if current % 5 == 0 or current == total:
-                     status.update(label=f"📖 Reading articles... ({percent}%)")
-            
-            # RUN THE SCRAPER! (This visits all sites)
-            enhanced_articles = asyncio.run(enhance_articles_async(
-                raw_articles, 
-                limit=None, 
-                progress_callback=update_progress
-            ))
-            
-            # STEP 3: CLASSIFY & SUMMARIZE WITH GEMINI
-            status.write("🤖 Performing AI Classification & Summarization...")
-            for art in enhanced_articles:
-                headline = art.get('title', '')
-                source = art.get('source', '')
-                content = art.get('full_text', '')
-                
-                # Classify
-                art['gemini_sector'] = classify_article_gemini(headline, source, content, sector_options)
-                
-                # Summarize
-                if content and not art.get('is_paywall'):
-                    art['gemini_summary'] = summarize_text_gemini(content)
-            
             progress_bar.progress(100)
             
             st.session_state.articles = enhanced_articles
@@ -247,85 +521,94 @@ if st.session_state.articles:
     st.subheader(f"📋 Results for '{st.session_state.get('last_query', active_query)}' | Sector: {sector_label}")
 
     
+    # --- PAGINATION ---
+    # Render only one page of cards: the rerun cost stays constant no
+    # matter how many articles the search returned.
+    PAGE_SIZE = 50
+    total_articles = len(st.session_state.articles)
+    total_pages = max(1, math.ceil(total_articles / PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=total_pages, value=1)
+    start = (page - 1) * PAGE_SIZE
+    page_articles = st.session_state.articles[start:start + PAGE_SIZE]
+    st.caption(f"Showing {start + 1}-{min(start + PAGE_SIZE, total_articles)} of {total_articles} articles")
+    
     # --- SCROLLABLE CONTAINER ---
     # A box with fixed height (800px) so you can scroll inside it.
+    # All cards are concatenated into ONE markdown call: a single websocket
+    # message and DOM insert instead of ~10 widgets per article. The
+    # expander becomes a plain <details> block, so opening it costs no
+    # Streamlit round-trip either.
     with st.container(height=800):
-        for i, article in enumerate(st.session_state.articles):
-            title = article['title']
-            source = article['source']
+        card_parts = []
+        for i, article in enumerate(page_articles, start=start):
+            title = html.escape(article['title'])
+            source = html.escape(article['source'])
             summary = article.get('summary', 'No summary available.')
             full_text = article.get('full_text', '')
             is_paywall = article.get('is_paywall', False)
-            link = article['link']
-            published = article['published']
+            link = html.escape(article['link'], quote=True)
+            published = html.escape(str(article['published']))
+            gemini_sector = html.escape(article.get('gemini_sector', 'GENERAL'))
             
-            # --- ARTICLE CARD ---
-            with st.container():
-                # Title fits?
-                st.markdown(f"### {i+1}. [{title}]({link})")
-                gemini_sector = article.get('gemini_sector', 'GENERAL')
-                st.markdown(f"**AI Classification:** `{gemini_sector}`")
-                st.caption(f"**Source:** {source} | **Published:** {published}")
+            # 1. Structured Summary (AI text, or local 6-line fallback)
+            gemini_summary = article.get('gemini_summary')
+            if gemini_summary:
+                summary_box = html.escape(gemini_summary).replace('\n', '<br>')
+            else:
+                # Fallback to local 6-line splitting
+                sent_list = _SENT_SPLIT.split(summary)
+                clean_sents = [s.strip() for s in sent_list if len(s.strip()) > 20]
+                
+                if len(clean_sents) < 6:
+                    words = summary.split()
+                    if len(words) > 60:
+                        chunk = len(words) // 6
+                        clean_sents = [" ".join(words[j*chunk:(j+1)*chunk]) for j in range(6)]
                 
-                # DROPDOWN: "Read Full Article Content"
-                # Everything inside here is hidden until clicked
-                with st.expander("📖 Read AI Intelligence Summary & Content"):
-                    # 1. Structured 6-Line Summary
-                    st.markdown("#### 📄 Intelligence Summary (AI Generated)")
-                    
-                    gemini_summary = article.get('gemini_summary')
-                    if gemini_summary:
-                        st.markdown(f"<div style='background-color: #f0f2f6; padding: 15px; border-radius: 8px; color: #000000;'>{gemini_summary.replace('\n', '<br>')}</div>", unsafe_allow_html=True)
-                    else:
-                        # Fallback to local 6-line splitting
-                        sent_list = re.split(r'(?<=[.!?])\s+', summary)
-                        clean_sents = [s.strip() for s in sent_list if len(s.strip()) > 20]
-                        
-                        if len(clean_sents) < 6:
-                            words = summary.split()
-                            if len(words) > 60:
-                                chunk = len(words) // 6
-                                clean_sents = [" ".join(words[j*chunk:(j+1)*chunk]) for j in range(6)]
-                        
-                        summary_box = "".join([f"• {s}<br><br>" for s in clean_sents[:6]])
-                        st.markdown(f"<div style='background-color: #f0f2f6; padding: 15px; border-radius: 8px; color: #000000;'>{summary_box}</div>", unsafe_allow_html=True)
-
-                    
-                    # 2. Full Text
-                    st.markdown("#### Full Article")
-                    if is_paywall:
-                        st.warning("🔒 **Subscription Required**: This article seems to be behind a paywall.")
-                    
-                    if full_text:
-                        st.write(full_text)
-                    else:
-                        st.warning("⚠️ Could not extract full text.")
-
-                st.markdown(f"🔗 [**Go to Valid Original Article**]({link})")
-                st.markdown("---")
+                summary_box = "".join(f"• {html.escape(s)}<br><br>" for s in clean_sents[:6])
+            
+            # 2. Full Text
+            paywall_note = ""
+            if is_paywall:
+                paywall_note = "<p>🔒 <b>Subscription Required</b>: This article seems to be behind a paywall.</p>"
+            if full_text:
+                body_html = html.escape(full_text).replace('\n', '<br>')
+            else:
+                body_html = "⚠️ Could not extract full text."
+            
+            # --- ARTICLE CARD ---
+            card_parts.append(
+                f"<div style='margin-bottom: 24px;'>"
+                f"<h3>{i+1}. <a href='{link}'>{title}</a></h3>"
+                f"<p><b>AI Classification:</b> <code>{gemini_sector}</code><br>"
+                f"<small><b>Source:</b> {source} | <b>Published:</b> {published}</small></p>"
+                f"<details><summary>📖 Read AI Intelligence Summary &amp; Content</summary>"
+                f"<h4>📄 Intelligence Summary (AI Generated)</h4>"
+                f"<div style='background-color: #f0f2f6; padding: 15px; border-radius: 8px; color: #000000;'>{summary_box}</div>"
+                f"<h4>Full Article</h4>{paywall_note}<p>{body_html}</p>"
+                f"</details>"
+                f"<p>🔗 <a href='{link}'><b>Go to Valid Original Article</b></a></p><hr>"
+                f"</div>"
+            )
+        
+        st.markdown("".join(card_parts), unsafe_allow_html=True)
 
     # --- DOWNLOAD BUTTONS ---
-    df = pd.DataFrame(st.session_state.articles)
-    
-    # Prepare Excel file
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='News')
-    buffer.seek(0)
+    # Serialized once per result set; reruns are served from the cache.
+    xlsx_bytes, csv_data = build_downloads(st.session_state.articles)
     
     col_dl1, col_dl2 = st.columns(2)
     with col_dl1:
         st.download_button(
             label="📥 Download as Excel",
-            data=buffer,
+            data=xlsx_bytes,
             file_name=f"news_{st.session_state.get('last_query', 'results')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
     with col_dl2:
-        csv = df.to_csv(index=False)
         st.download_button(
             label="📥 Download as CSV",
-            data=csv,
+            data=csv_data,
             file_name=f"news_{st.session_state.get('last_query', 'results')}.csv",
             mime="text/csv"
         )
@@ -6,12 +6,128 @@ Think of this as a "Digital Reader Robot".
 
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
+import atexit
+import threading
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from lxml import etree
 import re
 import json
 import random
+from collections import Counter
 from urllib.parse import urlparse, parse_qs
 
+# The decoder only ever reads the <c-wiz data-p> node, so don't build
+# a tree for the rest of the Google News interstitial page.
+_CWIZ_STRAINER = SoupStrainer('c-wiz')
+
+# Strip heavyweight inline blocks before parsing so the parser never sees them.
+_INLINE_NOISE_RE = re.compile(r'<(script|style|noscript)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+# One pass over the top of the raw page replaces eight Python substring
+# scans over a fully materialized, lowercased document text.
+_PAYWALL_RE = re.compile(
+    rb"(?i)subscription required|subscribe now|already a subscriber|"
+    rb"log in to continue|read the full article|premium content|"
+    rb"register to continue|you have reached your limit"
+)
+
+# Sentence boundaries for the wall-of-text fallback: the capital-letter
+# lookahead only avoids breaks before lowercase continuations (e.g. after
+# "3 p.m. today"); abbreviations followed by a name ("Mr. Smith") still
+# split, same as a blind '. ' replace would
+_SENT_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+_MULTI_NL_RE = re.compile(r'\n{3,}')
+
+# Fallback parser for broken markup that trips the default one
+_RECOVER_PARSER = lxml.html.HTMLParser(recover=True)
+
+# One shared ClientSession for the whole scrape. Opening a session per run
+# (let alone per request) pays a fresh TCP + TLS handshake every time; a
+# pooled connector keeps connections warm and caps sockets per host.
+_SESSION = None
+_SESSION_LOOP = None
+
+
+# Politeness caps per publisher host. With each host bounded on its own,
+# the global valve can open much wider without hammering any single site.
+_HOST_SEMS = {}
+
+
+def _host_semaphore(url):
+    host = urlparse(url).netloc
+    sem = _HOST_SEMS.get(host)
+    if sem is None:
+        sem = _HOST_SEMS.setdefault(host, asyncio.Semaphore(4))
+    return sem
+
+
+def _shutdown_stale_session(session):
+    """
+    Close a session left over from a previous event loop. Its own loop is
+    already gone (asyncio.run tears its loop down), and a new loop can't
+    be driven from inside the currently running one, so the close()
+    coroutine runs on a short-lived private loop in a helper thread.
+    """
+    def _close():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(session.close())
+        except Exception:
+            pass
+        finally:
+            loop.close()
+
+    threading.Thread(target=_close, daemon=True).start()
+
+
+def _get_session():
+    """Returns the shared ClientSession, rebuilding it if the event loop changed."""
+    global _SESSION, _SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    if _SESSION is None or _SESSION.closed or _SESSION_LOOP is not loop:
+        # Close the previous run's session before replacing it: every
+        # search runs under a fresh asyncio.run loop, and just dropping
+        # the reference would leak its connector and open sockets for
+        # the life of the Streamlit process.
+        if _SESSION is not None and not _SESSION.closed:
+            _shutdown_stale_session(_SESSION)
+        # Semaphores belong to a loop too - start fresh with the session
+        _HOST_SEMS.clear()
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=200,
+                limit_per_host=8,
+                ttl_dns_cache=300,
+                use_dns_cache=True,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True,
+            ),
+            # CookieJar = Memory of cookies (necessary for some websites to work)
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+        )
+        _SESSION_LOOP = loop
+    return _SESSION
+
+
+def _close_session():
+    """atexit hook: close the shared session so sockets don't linger."""
+    if _SESSION is not None and not _SESSION.closed:
+        try:
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(_SESSION.close())
+            loop.close()
+        except Exception:
+            pass
+
+
+atexit.register(_close_session)
+
+
+def _element_text(el, joiner=' '):
+    """Text of an lxml element with whitespace between text nodes."""
+    return joiner.join(t.strip() for t in el.itertext() if t.strip())
+
 # --- GOOGLE NEWS DECODER ---
 # What is this?
 # Google News gives us "encrypted" links (like news.google.com/Cahd...).
@@ -25,14 +141,24 @@ async def decode_google_news_url(session, url):
         # Standard "headers" tell the website we are a real Chrome browser, not a robot.
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept-Encoding': 'gzip, deflate',  # aiohttp decompresses for us
         }
         
+        # 0. Cheap path first: Google often answers with a plain redirect.
+        # One request, no HTML parse, no batchexecute POST.
+        async with session.get(url, headers=headers, allow_redirects=False,
+                               timeout=aiohttp.ClientTimeout(total=10)) as probe:
+            if probe.status in (301, 302, 303, 307, 308):
+                location = probe.headers.get('Location', '')
+                if location and 'news.google.com' not in location:
+                    return location
+
         # 1. Ask Google for the page
         async with session.get(url, headers=headers, allow_redirects=True) as resp:
             text = await resp.text()
 
         # 2. Extract the hidden code (called 'data-p') from the page HTML
-        soup = BeautifulSoup(text, 'lxml')
+        soup = BeautifulSoup(text, 'lxml', parse_only=_CWIZ_STRAINER)
         c_wiz = soup.select_one('c-wiz[data-p]')
         
         if not c_wiz:
@@ -80,6 +206,105 @@ async def decode_google_news_url(session, url):
         return url
 
 
+async def decode_google_news_urls_batch(session, urls):
+    """
+    Decodes many 'news.google.com' URLs in two round-trip phases instead
+    of one GET + one POST each: the interstitial pages are fetched
+    concurrently for their 'data-p' payloads, then a single batchexecute
+    POST carries every Fbv4je envelope at once.
+    Returns {google_url: real_url}; anything that fails maps to itself.
+    """
+    resolved = {u: u for u in urls}
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    }
+
+    # Phase 1: pull the hidden 'data-p' code out of every page concurrently.
+    # URLs that answer with a plain redirect resolve right here and never
+    # enter the batchexecute POST.
+    async def fetch_obj(url):
+        try:
+            async with session.get(url, headers=headers, allow_redirects=False,
+                                   timeout=aiohttp.ClientTimeout(total=10)) as probe:
+                if probe.status in (301, 302, 303, 307, 308):
+                    location = probe.headers.get('Location', '')
+                    if location and 'news.google.com' not in location:
+                        resolved[url] = location
+                        return None
+            async with session.get(url, headers=headers, allow_redirects=True) as resp:
+                text = await resp.text()
+            soup = BeautifulSoup(text, 'lxml', parse_only=_CWIZ_STRAINER)
+            c_wiz = soup.select_one('c-wiz[data-p]')
+            if not c_wiz:
+                # Maybe the redirect already landed on the real site
+                if "news.google.com" not in str(resp.url):
+                    resolved[url] = str(resp.url)
+                return None
+            obj = json.loads(c_wiz.get('data-p').replace('%.@.', '["garturlreq",'))
+            return url, obj[:-6] + obj[-2:]
+        except Exception:
+            return None
+
+    pairs = [p for p in await asyncio.gather(*(fetch_obj(u) for u in urls)) if p]
+    if not pairs:
+        return resolved
+
+    # Phase 2: ONE batchexecute POST with all envelopes. Every envelope
+    # carries its own numeric request id, echoed back in the reply, so
+    # answers are matched by id instead of by position - batchexecute may
+    # omit, reorder or fail individual envelopes, and a positional zip
+    # would silently resolve later URLs to the wrong article.
+    id_to_url = {str(i + 1): url for i, (url, _) in enumerate(pairs)}
+    payload = {
+        'f.req': json.dumps([[
+            ['Fbv4je', json.dumps(obj), 'null', str(i + 1)]
+            for i, (_, obj) in enumerate(pairs)
+        ]])
+    }
+    api_headers = {
+        'content-type': 'application/x-www-form-urlencoded;charset=UTF-8',
+        'user-agent': headers['User-Agent'],
+    }
+    try:
+        async with session.post(
+            "https://news.google.com/_/DotsSplashUi/data/batchexecute",
+            headers=api_headers,
+            data=payload
+        ) as api_resp:
+            api_text = await api_resp.text()
+
+        cleaned_text = api_text.replace(")]}'", "").strip()
+        array_data = json.loads(cleaned_text)
+
+        # Only the Fbv4je rows answer our envelopes; each echoes the id
+        # of the envelope it answers in its last slot
+        for row in array_data:
+            if not (isinstance(row, list) and len(row) > 6 and row[1] == 'Fbv4je'):
+                continue
+            url = id_to_url.get(str(row[6]))
+            if url is None:
+                continue
+            try:
+                resolved[url] = json.loads(row[2])[1]
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+    return resolved
+
+
+async def _predecode_google_links(session, targets):
+    """Resolves all Google News links in-place before scraping starts."""
+    urls = list({a['link'] for a in targets if 'news.google.com' in a.get('link', '')})
+    if not urls:
+        return
+    mapping = await decode_google_news_urls_batch(session, urls)
+    for article in targets:
+        link = article.get('link', '')
+        article['link'] = mapping.get(link, link)
+
+
 # This function goes to a single website link and reads the FULL text.
 async def scrape_article_content_async(session, url):
     """
@@ -97,114 +322,182 @@ async def scrape_article_content_async(session, url):
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+            'Accept-Encoding': 'gzip, deflate',  # HTML compresses ~5:1; aiohttp decompresses for us
             'Accept-Language': 'en-US,en;q=0.9',
             'Referer': 'https://news.google.com/', # We say "Google sent us!"
         }
         
         # STEP 2: Download the page
-        # We wait up to 30 seconds.
-        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30), allow_redirects=True) as response:
-            if response.status != 200:
-                # 401/403 means "Access Denied" (Paywall)
-                if response.status in [401, 403]:
-                    return {"full_text": "", "summary": "", "is_paywall": True}
-                return None
-            
-            html = await response.text()
-            soup = BeautifulSoup(html, 'lxml') # BeautifulSoup makes the HTML readable
-            
-            # --- PAYWALL DETECTION ---
-            # We look for specific words that mean "You need to pay".
-            paywall_keywords = [
-                "subscription required", "subscribe now", "already a subscriber", 
-                "log in to continue", "read the full article", "premium content", 
-                "register to continue", "you have reached your limit"
-            ]
-            
-            text_lower = soup.get_text().lower()
-            is_paywall = False
-            for keyword in paywall_keywords:
-                if keyword in text_lower[:1000]: # Check top of page
-                    is_paywall = True
-                    break
-            
-            # --- CLEANING THE PAGE ---
-            # Remove ads, menus, popups, and other junk.
-            for noise in soup(["script", "style", "nav", "header", "footer", "aside", "form", "iframe", "button", "ads", "noscript", "svg"]):
-                noise.decompose()
-            
-            # --- FINDING THE ARTICLE TEXT (Simple Logic) ---
-            # We look for 'p' tags (paragraphs).
-            # If a paragraph has more than 30 characters, it's probably real text.
-            parents = []
-            for p in soup.find_all('p'):
-                text = p.get_text(strip=True)
-                if len(text) > 30: 
-                    parents.append(p.parent)
-            
-            # We try to find the "Main Container" (the part of the page with the most text).
-            if not parents:
-                best_container = soup.body
-            else:
-                best_container = None
-                max_score = 0
-                unique_parents = set(parents)
-                for parent in unique_parents:
-                    current_score = 0
-                    for child_p in parent.find_all('p', recursive=False): 
-                        current_score += len(child_p.get_text(strip=True))
-                        
-                    if current_score < 200:
-                        # Fallback: Count all text in block
-                        current_score = len(parent.get_text(strip=True))
-                        
-                    if current_score > max_score:
-                        max_score = current_score
-                        best_container = parent
-            
-            target = best_container if best_container else soup.body
-            if not target: target = soup
+        # We wait up to 30 seconds, and retry transient throttles/outages
+        # (429/502/503/504) with exponential backoff, honoring Retry-After.
+        raw = None
+        charset = 'utf-8'
+        for attempt in range(3):
+            retry_delay = None
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30), allow_redirects=True) as response:
+                if response.status in (429, 502, 503, 504) and attempt < 2:
+                    try:
+                        retry_delay = min(8.0, float(response.headers.get('Retry-After')))
+                    except (TypeError, ValueError):
+                        retry_delay = min(8.0, 0.5 * (2 ** attempt))
+                elif response.status != 200:
+                    # 401/403 means "Access Denied" (Paywall)
+                    if response.status in [401, 403]:
+                        return {"full_text": "", "summary": "", "is_paywall": True}
+                    return None
+                else:
+                    # Chunked read with a cap: the article body virtually
+                    # always lives in the first half-MB, so stop paying
+                    # bandwidth and parse time for the rest of heavy pages.
+                    buf = bytearray()
+                    async for chunk in response.content.iter_chunked(16384):
+                        buf += chunk
+                        if len(buf) > 512_000:
+                            break
+                    raw = bytes(buf)
+                    charset = response.charset or 'utf-8'
+            if raw is not None:
+                break
+            # Back off with the response context already closed: sleeping
+            # inside it would hold a pooled connection plus both semaphore
+            # slots for the whole delay.
+            await asyncio.sleep(retry_delay)
+        if raw is None:
+            return None
             
-            # Collect all paragraphs from the best container
-            paragraphs = []
-            for p in target.find_all('p'):
-                text = p.get_text(separator=' ', strip=True)
-                if len(text) > 30:
-                    paragraphs.append(text)
-            
-            # Join them with double newlines
-            if len(paragraphs) > 2:
-                full_text = '\n\n'.join(paragraphs)
-            else:
-                full_text = target.get_text(separator='\n\n', strip=True)
-            
-            full_text = re.sub(r'\n{3,}', '\n\n', full_text)
-            
-            # FIX: Some sites (like MSN) don't use paragraphs correctly.
-            # If we have a huge wall of text, we try to add breaks at periods.
-            if len(full_text) > 500 and full_text.count('\n') < 5:
-                full_text = full_text.replace('. ', '.\n\n')
-            
-            # Create a short summary (first 3 paragraphs)
-            if paragraphs:
-                summary = ' '.join(paragraphs[:3])
-            else:
-                summary = full_text[:300] + "..." if len(full_text) > 300 else full_text
-            
-            # Final Check: If text is very short and mentions "subscribe", it's a paywall.
-            if len(full_text) < 300 and ("subscribe" in text_lower or "login" in text_lower):
+        # --- PAYWALL DETECTION ---
+        # One regex pass over the top of the raw bytes, before any
+        # decoding or parsing happens.
+        is_paywall = bool(_PAYWALL_RE.search(raw, 0, 4096))
+        
+        html = raw.decode(charset, errors='replace')
+        html = _INLINE_NOISE_RE.sub('', html)
+        # Raw lxml instead of the BeautifulSoup wrapper: same tree, but
+        # traversal and text extraction skip the BS4 API overhead.
+        try:
+            tree = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError):
+            tree = lxml.html.fromstring(html, parser=_RECOVER_PARSER)
+        
+        # --- CLEANING THE PAGE ---
+        # Remove ads, menus, popups, and other junk in one C-level pass.
+        etree.strip_elements(tree, 'nav', 'header', 'footer', 'aside',
+                             'form', 'iframe', 'button', 'svg', with_tail=False)
+        
+        # --- FINDING THE ARTICLE TEXT (Simple Logic) ---
+        # One pass over every 'p' tag: each paragraph's length is
+        # credited to its parent, and parents holding at least one
+        # real paragraph (>30 chars) become container candidates.
+        child_scores = Counter()
+        candidates = set()
+        for p in tree.iter('p'):
+            length = len(p.text_content().strip())
+            parent = p.getparent()
+            child_scores[parent] += length
+            if length > 30:
+                candidates.add(parent)
+        candidates.discard(None)
+        
+        body = tree.find('.//body')
+        
+        # We try to find the "Main Container" (the part of the page with the most text).
+        if not candidates:
+            best_container = body
+        else:
+            best_container = None
+            max_score = 0
+            for parent in candidates:
+                current_score = child_scores[parent]
+                if current_score < 200:
+                    # Fallback: Count all text in block
+                    current_score = len(parent.text_content().strip())
+                    
+                if current_score > max_score:
+                    max_score = current_score
+                    best_container = parent
+        
+        target = best_container if best_container is not None else body
+        if target is None: target = tree
+        
+        # Collect all paragraphs from the best container in one comprehension
+        # (LIST_APPEND bytecode instead of a method call per paragraph)
+        paragraphs = [
+            text for text in (_element_text(p) for p in target.iter('p'))
+            if len(text) > 30
+        ]
+        
+        # Join them with double newlines
+        if len(paragraphs) > 2:
+            full_text = '\n\n'.join(paragraphs)
+        else:
+            full_text = _element_text(target, joiner='\n\n')
+        
+        full_text = _MULTI_NL_RE.sub('\n\n', full_text)
+        
+        # FIX: Some sites (like MSN) don't use paragraphs correctly.
+        # If we have a huge wall of text, break at real sentence ends.
+        if len(full_text) > 500 and full_text.count('\n') < 5:
+            full_text = _SENT_RE.sub('\n\n', full_text)
+        
+        # Create a short summary (first 3 paragraphs)
+        if paragraphs:
+            summary = ' '.join(paragraphs[:3])
+        else:
+            summary = full_text[:300] + "..." if len(full_text) > 300 else full_text
+        
+        # Final Check: If text is very short and mentions "subscribe", it's a paywall.
+        # full_text is tiny here, so lowercasing it is nothing compared to
+        # the whole-document text pass this used to take.
+        if len(full_text) < 300:
+            full_lower = full_text.lower()
+            if "subscribe" in full_lower or "login" in full_lower:
                 is_paywall = True
 
-            return {
-                "full_text": full_text,
-                "summary": summary,
-                "is_paywall": is_paywall
-            }
+        return {
+            "full_text": full_text,
+            "summary": summary,
+            "is_paywall": is_paywall
+        }
     
     except Exception:
         # If scraping fails, we ignore it safely.
         return None
 
+# Streaming variant of the enhancer below: yields each article the moment
+# its scrape finishes instead of holding everything back for the slowest page.
+async def enhance_articles_stream(articles, limit=None):
+    """
+    Async generator: yields each article dict (with full_text / summary /
+    is_paywall filled in) as soon as its scrape completes, so callers can
+    start processing or rendering while the rest are still downloading.
+    """
+    targets = articles[:limit] if limit else articles
+
+    # Global valve can be wide open now that each host is capped separately
+    semaphore = asyncio.Semaphore(64)
+
+    async def sem_scrape(session, article):
+        async with semaphore, _host_semaphore(article['link']):
+            result = await scrape_article_content_async(session, article['link'])
+        if result:
+            article['full_text'] = result['full_text']
+            article['summary'] = result['summary']
+            article['is_paywall'] = result['is_paywall']
+        else:
+            article['full_text'] = ""
+            article['summary'] = "Could not load content."
+            article['is_paywall'] = False
+        return article
+
+    session = _get_session()
+    # Resolve every Google News link in one batched exchange up front, so
+    # the per-article decode inside the scraper only fires for stragglers.
+    await _predecode_google_links(session, targets)
+    tasks = [asyncio.ensure_future(sem_scrape(session, a)) for a in targets]
+    for finished in asyncio.as_completed(tasks):
+        yield await finished
+
+
 # This function updates our list of articles with the detailed info
 async def enhance_articles_async(articles, limit=None, progress_callback=None):
     """
@@ -215,45 +508,47 @@ async def enhance_articles_async(articles, limit=None, progress_callback=None):
     total = len(targets)
     completed = 0
     
-    # CookieJar = Memory of cookies (necessary for some websites to work)
-    jar = aiohttp.CookieJar(unsafe=True)
-    
-    # SAFETY VALVE: Only open 20 websites at the exact same time.
-    # If we tried 500 at once, our internet or computer would crash.
-    semaphore = asyncio.Semaphore(20)
+    # SAFETY VALVE: cap total connections, plus at most 4 per host so one
+    # slow or throttling publisher can't stall the whole batch.
+    semaphore = asyncio.Semaphore(64)
 
-    async def sem_scrape(session, url):
-        async with semaphore:
+    async def sem_scrape(idx, session, url):
+        async with semaphore, _host_semaphore(url):
             result = await scrape_article_content_async(session, url)
-            
-            nonlocal completed
-            completed += 1
-            # Tell the App: "Hey, I finished one more!"
-            if progress_callback:
-                try:
-                    progress_callback(completed, total)
-                except:
-                    pass
-            return result
-
-    # Start the session (like opening a browser window)
-    async with aiohttp.ClientSession(cookie_jar=jar) as session:
-        tasks = []
-        for article in targets:
-            tasks.append(sem_scrape(session, article['link']))
-        
-        # gather = Run all keys in parallel!
-        results = await asyncio.gather(*tasks)
-        
-        # Save results back to our article list
-        for i, result in enumerate(results):
-            if result:
-                targets[i]['full_text'] = result['full_text']
-                targets[i]['summary'] = result['summary']
-                targets[i]['is_paywall'] = result['is_paywall']
-            else:
-                targets[i]['full_text'] = ""
-                targets[i]['summary'] = "Could not load content."
-                targets[i]['is_paywall'] = False
         
+        # The concurrency slots are released before we touch the UI: the
+        # Streamlit callback can block, and holding a slot through it
+        # would stall another download for no reason.
+        nonlocal completed
+        completed += 1
+        # Tell the App: "Hey, I finished one more!"
+        if progress_callback:
+            try:
+                progress_callback(completed, total)
+            except:
+                pass
+        return idx, result
+
+    # Grab the shared session (like reusing one browser window)
+    session = _get_session()
+    # Decode all Google News links with one batched exchange first
+    await _predecode_google_links(session, targets)
+    tasks = [asyncio.create_task(sem_scrape(i, session, article['link']))
+             for i, article in enumerate(targets)]
+    
+    # Save each result back the moment it lands instead of holding a
+    # second full-size results list next to the article list until the
+    # slowest page finishes. Each scraped body is written in place and
+    # the intermediate dict can be collected right away.
+    for future in asyncio.as_completed(tasks):
+        i, result = await future
+        if result:
+            targets[i]['full_text'] = result['full_text']
+            targets[i]['summary'] = result['summary']
+            targets[i]['is_paywall'] = result['is_paywall']
+        else:
+            targets[i]['full_text'] = ""
+            targets[i]['summary'] = "Could not load content."
+            targets[i]['is_paywall'] = False
+    
     return targets
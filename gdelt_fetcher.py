@@ -122,7 +122,7 @@ def fetch_gdelt_simple(keyword: str, days: int = 7, max_articles: int = 5000) ->
                     
                     # Clean up the HTML from the description
                     raw_description = entry.get('summary', '')
-                    soup = BeautifulSoup(raw_description, 'html.parser')
+                    soup = BeautifulSoup(raw_description, 'lxml')
                     clean_description = soup.get_text(separator=' ', strip=True)
                     
                     articles.append({
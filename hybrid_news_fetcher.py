@@ -208,8 +208,18 @@ class HybridNewsFetcher:
         return unique_articles
 
 
+# Lazily created module-level fetcher, shared across calls
+_FETCHER = None
+
+
+def _get_fetcher() -> HybridNewsFetcher:
+    global _FETCHER
+    if _FETCHER is None:
+        _FETCHER = HybridNewsFetcher()
+    return _FETCHER
+
+
 def fetch_hybrid_news(query: str, duration: int = 1) -> List[Dict]:
     """Main function to fetch news from hybrid sources"""
-    fetcher = HybridNewsFetcher()
-    articles = asyncio.run(fetcher.fetch_all_sources(query))
+    articles = asyncio.run(_get_fetcher().fetch_all_sources(query))
     return articles
@@ -2,11 +2,15 @@
 import re
 from collections import Counter
 
-def extract_entities_simple(headlines_data: list, query: str) -> dict:
-    """Extract entities using simple NLP patterns"""
-    
-    # Common words to exclude
-    exclude_words = {
+# Compiled once at import so every headline reuses the same pattern object
+_ENTITY_PATTERN = re.compile(r'\b[A-Z][A-Za-z]*(?:\s+[A-Z][A-Za-z]*)*\b')
+
+_GOV_WORDS = ('ministry', 'department', 'government', 'agency', 'commission')
+_RESEARCH_WORDS = ('university', 'institute', 'research', 'lab')
+
+# Common words to exclude - frozen once at import instead of a set literal
+# being rebuilt (and re-hashed) on every call
+_EXCLUDE_WORDS = frozenset({
         'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
         'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
         'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
@@ -19,26 +23,26 @@ def extract_entities_simple(headlines_data: list, query: str) -> dict:
         'little', 'own', 'other', 'old', 'right', 'big', 'high', 'different',
         'small', 'large', 'next', 'early', 'young', 'important', 'public',
         'bad', 'same', 'able', 'india', 'indian', 'us', 'uk', 'china', 'says'
-    }
-    
-    entities = []
+})
+
+
+def extract_entities_simple(headlines_data: list, query: str) -> dict:
+    """Extract entities using simple NLP patterns"""
     
+    # Count frequencies as we go - no intermediate list of every mention
+    entity_counts = Counter()
+
     for item in headlines_data:
         headline = item.get('headline', '')
         description = item.get('description', '')
         text = f"{headline} {description}"
-        
-        # Find capitalized words/phrases (likely company names)
-        pattern = r'\b[A-Z][A-Za-z]*(?:\s+[A-Z][A-Za-z]*)*\b'
-        matches = re.findall(pattern, text)
-        
-        for match in matches:
-            # Filter out single letters and common words
-            if len(match) > 2 and match.lower() not in exclude_words:
-                entities.append(match.strip())
-    
-    # Count frequencies
-    entity_counts = Counter(entities)
+
+        # Find capitalized words/phrases (likely company names),
+        # filtering out single letters and common words
+        entity_counts.update(
+            match.strip() for match in _ENTITY_PATTERN.findall(text)
+            if len(match) > 2 and match.lower() not in _EXCLUDE_WORDS
+        )
     
     # Get top 10
     top_entities = entity_counts.most_common(10)
@@ -51,11 +55,12 @@ def extract_entities_simple(headlines_data: list, query: str) -> dict:
     }
     
     for rank, (name, count) in enumerate(top_entities, 1):
-        # Determine entity type
+        # Determine entity type (name lowered once, not once per keyword)
+        name_lower = name.lower()
         entity_type = "company"
-        if any(word in name.lower() for word in ['ministry', 'department', 'government', 'agency', 'commission']):
+        if any(word in name_lower for word in _GOV_WORDS):
             entity_type = "government_agency"
-        elif any(word in name.lower() for word in ['university', 'institute', 'research', 'lab']):
+        elif any(word in name_lower for word in _RESEARCH_WORDS):
             entity_type = "research_org"
         
         confidence = min(0.95, 0.5 + (count / len(headlines_data)) * 0.5)
@@ -1,4 +1,5 @@
 import google.generativeai as genai
+import functools
 import json
 import re
 
@@ -6,19 +7,44 @@ import os
 
 # Use environment variable for security
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
-if GEMINI_API_KEY:
+
+
+# Matches the JSON object inside a possibly chatty Gemini reply
+_JSON_OBJ_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Core 8 Search Query optimization - built once, shared by every call
+_SEARCH_QUERIES = {
+    "Lifestyle": "lifestyle trends OR consumer behavior OR luxury goods news",
+    "Sustainability": "sustainability initiatives OR renewable energy news OR circular economy",
+    "Tech & AI": "technology sector news OR software companies OR AI startups",
+    "Health": "health sector news OR medical advancements OR wellness industry",
+    "Finance": "banking sector news OR fintech trends OR stock market",
+    "Education": "education technology news OR higher education trends OR edtech",
+    "Sports": "sports industry news OR sports business OR athletic brands",
+    "Startups": "startup funding news OR venture capital OR entrepreneurial ecosystem"
+}
+_CORE_SECTORS = {name.lower(): name for name in _SEARCH_QUERIES}
+
+
+@functools.lru_cache(maxsize=1)
+def _get_gemini_model():
+    """Configure Gemini and build the model handle on first use only."""
+    if not GEMINI_API_KEY:
+        return None
     genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel('gemini-1.5-flash')
+
 
 def get_sector_via_gemini(query):
     """
     Uses Gemini AI to determine the industry sector of a keyword.
     """
-    if not GEMINI_API_KEY:
+    model = _get_gemini_model()
+    if model is None:
         return query.title()
 
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
+
         # Stricter prompt to ensure mapping to existing categories or descriptive ones
         prompt = f"""
         You are a professional industry analyst. Analyze the following search term: "{query}"
@@ -55,7 +81,7 @@ def get_sector_via_gemini(query):
             res_text = res_text.split("```")[-1].split("```")[0].strip()
         
         # Remove any leading/trailing non-JSON characters just in case
-        match = re.search(r'\{.*\}', res_text, re.DOTALL)
+        match = _JSON_OBJ_RE.search(res_text)
         if match:
             res_text = match.group(0)
             
@@ -65,6 +91,22 @@ def get_sector_via_gemini(query):
         print(f"Smart Search Gemini Error: {e}")
         return None
 
+_SECTOR_CACHE = {}
+
+
+def _cached_sector(query_lower: str):
+    """Per-process memo: repeat queries skip the 0.5-1.5s Gemini round-trip.
+    Only successful lookups are cached - memoizing the None error return
+    would pin a query to the title-cased fallback after one transient
+    network failure."""
+    sector = _SECTOR_CACHE.get(query_lower)
+    if sector is None:
+        sector = get_sector_via_gemini(query_lower)
+        if sector:
+            _SECTOR_CACHE[query_lower] = sector
+    return sector
+
+
 def expand_query(user_query: str) -> dict:
     """
     Expands user terms with Gemini-powered sector identification.
@@ -72,28 +114,20 @@ def expand_query(user_query: str) -> dict:
     """
     q = user_query.lower().strip()
     
-    # 1. Ask Gemini for the sector
-    identified_label = get_sector_via_gemini(user_query)
+    # 1. A core-8 sector needs no Gemini call at all
+    identified_label = _CORE_SECTORS.get(q)
     
-    # 2. Fallback only if Gemini fails
+    # 2. Otherwise ask Gemini (cached per normalized query)
+    if not identified_label:
+        identified_label = _cached_sector(q)
+    
+    # 3. Fallback only if Gemini fails
     if not identified_label:
         identified_label = user_query.strip().title()
 
-    # Core 8 Search Query optimization
-    search_queries = {
-        "Lifestyle": "lifestyle trends OR consumer behavior OR luxury goods news",
-        "Sustainability": "sustainability initiatives OR renewable energy news OR circular economy",
-        "Tech & AI": "technology sector news OR software companies OR AI startups",
-        "Health": "health sector news OR medical advancements OR wellness industry",
-        "Finance": "banking sector news OR fintech trends OR stock market",
-        "Education": "education technology news OR higher education trends OR edtech",
-        "Sports": "sports industry news OR sports business OR athletic brands",
-        "Startups": "startup funding news OR venture capital OR entrepreneurial ecosystem"
-    }
-
     # If it's one of our core 8, use the optimized query. 
     # Otherwise, generate a specific search for that identified sector.
-    final_query = search_queries.get(identified_label, f"{user_query} {identified_label} news trends")
+    final_query = _SEARCH_QUERIES.get(identified_label, f"{user_query} {identified_label} news trends")
 
     return {
         "original": user_query,